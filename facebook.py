@@ -1,8 +1,12 @@
+import asyncio
+import functools
 import logging
 import os
+import random
 import re
 
 import httpx
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +19,19 @@ _PAGE_ID_RE = re.compile(r'^[A-Za-z0-9][\w.\-]{0,99}$')
 _RATE_LIMIT_CODES = frozenset({4, 17, 32, 613})
 _PERMISSION_CODES = frozenset({10, *range(200, 300)})
 
+# Retry policy for transient Graph API failures: exponential backoff with
+# jitter, capped at _MAX_BACKOFF seconds between attempts.
+_MAX_ATTEMPTS = 4
+_BACKOFF_BASE = 0.5
+_MAX_BACKOFF = 30.0
+_BACKOFF_JITTER = 0.25
+# Any other httpx.TransportError fails at once; all surface as FacebookAPIError.
+_RETRYABLE_ERRORS = (
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    httpx.RemoteProtocolError,
+)
+
 _client: httpx.AsyncClient | None = None
 
 
@@ -45,7 +62,17 @@ class PermissionError(FacebookAPIError):
 def _get_client() -> httpx.AsyncClient:
     global _client
     if _client is None:
-        _client = httpx.AsyncClient(timeout=10.0)
+        # HTTP/2 lets concurrent Graph API calls multiplex over one TLS
+        # connection instead of opening a new one per request under bursts.
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(10.0, connect=2.0),
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=50,
+                keepalive_expiry=60.0,
+            ),
+        )
     return _client
 
 
@@ -56,6 +83,9 @@ async def close_client() -> None:
         _client = None
 
 
+# The environment is fixed for the life of the process; read the token once.
+# A missing token raises and is therefore not cached.
+@functools.cache
 def _get_access_token() -> str:
     token = os.getenv("FB_ACCESS_TOKEN", "").strip()
     if not token:
@@ -84,31 +114,35 @@ def _raise_for_api_error(data: dict) -> None:
     raise FacebookAPIError(msg)
 
 
-def _normalize_post(item: dict) -> dict:
+_EMPTY: dict = {}
+
+
+def _normalize_post(item: dict, _get=dict.get) -> dict:
+    # Called once per post on every cache miss; dict.get is bound as a
+    # default argument to skip the attribute lookup on each call.
     return {
-        "id": item.get("id", ""),
-        "message": item.get("message") or item.get("story") or "",
-        "created_time": item.get("created_time", ""),
-        "full_picture": item.get("full_picture"),
-        "permalink_url": item.get("permalink_url", ""),
-        "like_count": item.get("reactions", {}).get("summary", {}).get("total_count", 0),
-        "comment_count": item.get("comments", {}).get("summary", {}).get("total_count", 0),
+        "id": _get(item, "id", ""),
+        "message": _get(item, "message") or _get(item, "story") or "",
+        "created_time": _get(item, "created_time", ""),
+        "full_picture": _get(item, "full_picture"),
+        "permalink_url": _get(item, "permalink_url", ""),
+        "like_count": _get(
+            _get(_get(item, "reactions", _EMPTY), "summary", _EMPTY), "total_count", 0
+        ),
+        "comment_count": _get(
+            _get(_get(item, "comments", _EMPTY), "summary", _EMPTY), "total_count", 0
+        ),
     }
 
 
-async def get_page_info(page_id: str) -> dict:
-    if not _PAGE_ID_RE.match(page_id):
-        raise PageNotFoundError(f"Invalid page_id: {page_id!r}")
-    logger.info("FB get_page_info: page_id=%s", page_id)
-    resp = await _get_client().get(
-        f"{GRAPH_API_BASE}/{page_id}",
-        params={
-            "fields": "id,name,picture.type(normal)",
-            "access_token": _get_access_token(),
-        },
-    )
-    data = resp.json()
-    _raise_for_api_error(data)
+_PAGE_FIELDS = "id,name,picture.type(normal)"
+_POST_FIELDS = (
+    "message,story,created_time,full_picture,permalink_url,"
+    "reactions.summary(true),comments.summary(true)"
+)
+
+
+def _parse_page_info(data: dict) -> dict:
     return {
         "id": data["id"],
         "name": data.get("name", ""),
@@ -116,18 +150,109 @@ async def get_page_info(page_id: str) -> dict:
     }
 
 
-async def get_page_posts(page_id: str, limit: int = 5) -> list[dict]:
+def _backoff_delay(attempt: int) -> float:
+    return min(_MAX_BACKOFF, _BACKOFF_BASE * 2**attempt) + random.uniform(
+        0, _BACKOFF_JITTER
+    )
+
+
+def _retry_after_delay(resp: httpx.Response, attempt: int) -> float:
+    """Honour a numeric Retry-After header, falling back to exponential backoff."""
+    retry_after = resp.headers.get("retry-after", "")
+    if retry_after.isdigit():
+        return min(_MAX_BACKOFF, int(retry_after)) + random.uniform(
+            0, _BACKOFF_JITTER
+        )
+    return _backoff_delay(attempt)
+
+
+async def _request_with_retry(method: str, url: str, **kwargs) -> httpx.Response:
+    """Send a request, retrying connection errors, timeouts, 429 and 5xx.
+
+    The last response is returned as-is once attempts run out; _graph_get
+    maps its status and body to an exception.
+    """
+    for attempt in range(_MAX_ATTEMPTS - 1):
+        try:
+            resp = await _get_client().request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            if not isinstance(e, _RETRYABLE_ERRORS):
+                logger.warning("FB request failed (%r), not retrying", e)
+                raise FacebookAPIError("Could not reach Facebook") from e
+            delay = _backoff_delay(attempt)
+            logger.warning("FB request failed (%r), retrying in %.2fs", e, delay)
+        else:
+            if resp.status_code == 429:
+                delay = _retry_after_delay(resp, attempt)
+            elif resp.status_code >= 500:
+                delay = _backoff_delay(attempt)
+            else:
+                return resp
+            logger.warning(
+                "FB request returned %d, retrying in %.2fs", resp.status_code, delay
+            )
+        await asyncio.sleep(delay)
+
+    try:
+        return await _get_client().request(method, url, **kwargs)
+    except httpx.TransportError as e:
+        logger.warning("FB request failed (%r), giving up", e)
+        raise FacebookAPIError("Could not reach Facebook") from e
+
+
+async def _graph_get(path: str, params: dict) -> dict:
+    resp = await _request_with_retry(
+        "GET",
+        f"{GRAPH_API_BASE}/{path}",
+        params={**params, "access_token": _get_access_token()},
+    )
+    try:
+        data = orjson.loads(resp.content)
+    except orjson.JSONDecodeError:
+        # Proxies and CDNs in front of the Graph API answer with HTML.
+        logger.warning("FB returned non-JSON body (HTTP %d)", resp.status_code)
+        raise FacebookAPIError(f"Facebook returned HTTP {resp.status_code}")
+    if not isinstance(data, dict):
+        logger.warning("FB returned non-object JSON (HTTP %d)", resp.status_code)
+        raise FacebookAPIError(f"Facebook returned HTTP {resp.status_code}")
+    _raise_for_api_error(data)
+    if resp.status_code >= 500:
+        raise FacebookAPIError(f"Facebook returned HTTP {resp.status_code}")
+    return data
+
+
+def _check_page_id(page_id: str) -> None:
     if not _PAGE_ID_RE.match(page_id):
         raise PageNotFoundError(f"Invalid page_id: {page_id!r}")
+
+
+async def get_page_bundle(page_id: str, limit: int = 5) -> tuple[dict, list[dict]]:
+    """Fetch page info and recent posts in a single Graph API round trip.
+
+    Uses field expansion on the page node so the posts edge comes back
+    nested in the same response.
+    """
+    _check_page_id(page_id)
+    logger.info("FB get_page_bundle: page_id=%s limit=%s", page_id, limit)
+    data = await _graph_get(
+        page_id,
+        {"fields": f"{_PAGE_FIELDS},posts.limit({limit}){{{_POST_FIELDS}}}"},
+    )
+    posts = data.get("posts", _EMPTY).get("data", ())
+    return _parse_page_info(data), list(map(_normalize_post, posts))
+
+
+async def get_page_info(page_id: str) -> dict:
+    _check_page_id(page_id)
+    logger.info("FB get_page_info: page_id=%s", page_id)
+    data = await _graph_get(page_id, {"fields": _PAGE_FIELDS})
+    return _parse_page_info(data)
+
+
+async def get_page_posts(page_id: str, limit: int = 5) -> list[dict]:
+    _check_page_id(page_id)
     logger.info("FB get_page_posts: page_id=%s limit=%s", page_id, limit)
-    resp = await _get_client().get(
-        f"{GRAPH_API_BASE}/{page_id}/posts",
-        params={
-            "fields": "message,story,created_time,full_picture,permalink_url,reactions.summary(true),comments.summary(true)",
-            "limit": limit,
-            "access_token": _get_access_token(),
-        },
+    data = await _graph_get(
+        f"{page_id}/posts", {"fields": _POST_FIELDS, "limit": limit}
     )
-    data = resp.json()
-    _raise_for_api_error(data)
-    return [_normalize_post(item) for item in data.get("data", [])]
+    return list(map(_normalize_post, data.get("data", ())))
@@ -1,16 +1,28 @@
+import asyncio
+import functools
+import gzip
+import hashlib
 import logging
 import os
+import re
 import time
+from collections import OrderedDict
+from collections.abc import Coroutine
 from contextlib import asynccontextmanager
 from pathlib import Path
-from urllib.parse import urlparse
+from types import MappingProxyType
+from typing import Any, NamedTuple
 
+import orjson
+import redis.asyncio as redis
 from dotenv import load_dotenv
-from fastapi import FastAPI, Query, Request
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, Response
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
 import facebook as fb
 
@@ -20,12 +32,49 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_STALE_SECONDS = int(os.getenv("CACHE_STALE_SECONDS", "3600"))
+# Shared posts cache and rate-limit storage for multi-worker deployments.
+REDIS_URL = os.getenv("REDIS_URL", "").strip() or None
 BASE_URL_PLACEHOLDER = "__BASE_URL__"
 NO_CACHE_HEADERS = {"Cache-Control": "no-cache, no-store, must-revalidate"}
+NO_CACHE_GZIP_HEADERS = {
+    **NO_CACHE_HEADERS,
+    "Content-Encoding": "gzip",
+    "Vary": "Accept-Encoding",
+}
 WIDGET_JS_PATH = Path(__file__).parent / "static" / "widget.js"
 DEMO_HTML_PATH = Path(__file__).parent / "static" / "demo.html"
 
-_posts_cache: dict[tuple[str, int], tuple[float, dict]] = {}
+# Static assets don't change at runtime; read once and template per base URL.
+_WIDGET_TEMPLATE = WIDGET_JS_PATH.read_bytes()
+_DEMO_TEMPLATE = DEMO_HTML_PATH.read_bytes()
+
+
+class _PostsEntry(NamedTuple):
+    expiry: float  # time.monotonic() clock
+    body: bytes  # serialised JSON response
+    gzip_body: bytes  # body pre-compressed once, served to gzip clients
+    etag: str  # strong validator for body
+    gzip_etag: str  # distinct strong validator for gzip_body (RFC 9110 8.8.3)
+
+
+# LRU ordered: least recently used first. Bounded by CACHE_MAX_ENTRIES since
+# page_id comes straight from the query string.
+_posts_cache: OrderedDict[tuple[str, int], _PostsEntry] = OrderedDict()
+_inflight: dict[tuple[str, int], asyncio.Task[_PostsEntry]] = {}
+# Recent permanent-looking failures as (expiry, exception), same LRU bound.
+_negative_cache: OrderedDict[tuple[str, int], tuple[float, Exception]] = OrderedDict()
+
+# Failures that won't resolve within seconds, and how long to remember them.
+# Rate limits and unknown Graph API errors are transient and never cached.
+_NEGATIVE_CACHE_TTLS: tuple[tuple[type[Exception], int], ...] = (
+    (fb.PageNotFoundError, 300),
+    (fb.TokenError, 60),
+    (fb.PermissionError, 60),
+)
+_background_tasks: set[asyncio.Task] = set()
+_redis: redis.Redis | None = None
 
 # ── API key configuration ─────────────────────────────────────────────────────
 #
@@ -93,13 +142,18 @@ _api_keys: dict[str, str] | None = _parse_api_keys()
 # ── CORS origins ──────────────────────────────────────────────────────────────
 
 
-def _build_cors_origins() -> list[str]:
+def _build_cors_origins() -> frozenset[str]:
+    """Return the allowed origins as a set for O(1) per-request membership checks.
+
+    Trailing slashes are stripped because browsers never send one in Origin.
+    """
     if _api_keys:
         origins: list[str] = []
         for domain in _api_keys.values():
             origins.extend(_cors_origins_for_domain(domain))
-        return origins
-    return [o.strip() for o in os.getenv("CORS_ORIGINS", "*").split(",") if o.strip()]
+    else:
+        origins = os.getenv("CORS_ORIGINS", "*").split(",")
+    return frozenset(o.strip().rstrip("/") for o in origins if o.strip())
 
 
 _cors_origins = _build_cors_origins()
@@ -117,12 +171,27 @@ def _identify_requester(request: Request) -> str:
     return f"ip:{client_ip}"
 
 
-limiter = Limiter(key_func=_identify_requester)
+# If Redis goes down, fall back to per-process counters rather than failing
+# every /api request.
+limiter = Limiter(
+    key_func=_identify_requester,
+    storage_uri=REDIS_URL or "memory://",
+    in_memory_fallback_enabled=True,
+)
 
 
 # ── App ────────────────────────────────────────────────────────────────────────
 
 
+class ORJSONResponse(Response):
+    """JSON response encoded with orjson (FastAPI's own version is deprecated)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
 def _log_startup_config() -> None:
     if _api_keys:
         logger.info("API key auth enabled for %d domain(s):", len(_api_keys))
@@ -134,6 +203,8 @@ def _log_startup_config() -> None:
         logger.warning(
             "API_KEYS not set — running in open development mode (no key required)"
         )
+    if REDIS_URL:
+        logger.info("Posts cache and rate limits shared via Redis")
 
 
 @asynccontextmanager
@@ -142,31 +213,46 @@ async def lifespan(app: FastAPI):
     _log_startup_config()
     yield
     await fb.close_client()
+    await _close_redis()
 
 
-app = FastAPI(title="fbwidget", lifespan=lifespan)
+app = FastAPI(
+    title="fbwidget", lifespan=lifespan, default_response_class=ORJSONResponse
+)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)  # type: ignore[arg-type]
 
 
-# ── Auth middleware ────────────────────────────────────────────────────────────
-# Registered BEFORE CORSMiddleware so CORS becomes the outermost layer.
-# This ensures every response — including 401s — carries CORS headers,
-# and OPTIONS preflight requests reach CORSMiddleware unobstructed.
+@app.exception_handler(StarletteHTTPException)
+async def http_exception_handler(request: Request, exc: StarletteHTTPException):
+    # Match the {"error": ...} shape the widget reads from every failure.
+    return ORJSONResponse(
+        {"error": exc.detail}, status_code=exc.status_code, headers=exc.headers
+    )
+
+
+# ── Auth ───────────────────────────────────────────────────────────────────────
+# A router dependency on /api/* only, so static routes pay nothing for auth and
+# open development mode skips it entirely. Rejections are raised as
+# HTTPException inside CORSMiddleware, so 401s still carry CORS headers, and
+# OPTIONS preflights are answered by CORSMiddleware before routing.
+
+
+# Origin headers are always scheme://host[:port]; a match beats urlparse() on
+# the per-request auth path.
+_ORIGIN_NETLOC_RE = re.compile(r"^https?://([^/?#]+)", re.IGNORECASE)
 
 
 def _extract_request_origin(request: Request) -> str:
     """Return the bare netloc (host or host:port) from the Origin header."""
-    origin_header = request.headers.get("origin", "")
-    if not origin_header:
-        return ""
-    return urlparse(origin_header).netloc.lower()
+    match = _ORIGIN_NETLOC_RE.match(request.headers.get("origin", ""))
+    return match.group(1).lower() if match else ""
 
 
-def _validate_api_key(request: Request) -> JSONResponse | None:
-    """Return a 401 response if the request fails key validation, else None."""
+def _validate_api_key(request: Request) -> None:
+    """Raise a 401 HTTPException if the request fails key validation."""
     if _api_keys is None:
-        return None
+        return
 
     api_key = request.headers.get("x-api-key", "")
     request_origin = _extract_request_origin(request)
@@ -175,20 +261,20 @@ def _validate_api_key(request: Request) -> JSONResponse | None:
         logger.warning(
             "Auth rejected — missing X-Api-Key header (origin: %s)", request_origin
         )
-        return JSONResponse({"error": "Missing X-Api-Key header"}, status_code=401)
+        raise HTTPException(401, "Missing X-Api-Key header")
 
     allowed_domain = _api_keys.get(api_key)
     if not allowed_domain:
         logger.warning(
             "Auth rejected — unknown key: %s… (origin: %s)", api_key[:8], request_origin
         )
-        return JSONResponse({"error": "Invalid API key"}, status_code=401)
+        raise HTTPException(401, "Invalid API key")
 
     if not request_origin:
         logger.warning(
             "Auth rejected — missing Origin header (key: %s…)", api_key[:8]
         )
-        return JSONResponse({"error": "Missing Origin header"}, status_code=401)
+        raise HTTPException(401, "Missing Origin header")
 
     if request_origin != allowed_domain:
         logger.warning(
@@ -197,28 +283,21 @@ def _validate_api_key(request: Request) -> JSONResponse | None:
             allowed_domain,
             request_origin,
         )
-        return JSONResponse({"error": "Origin does not match API key"}, status_code=401)
+        raise HTTPException(401, "Origin does not match API key")
 
-    return None
 
+api_router = APIRouter(
+    prefix="/api",
+    dependencies=[Depends(_validate_api_key)] if _api_keys else [],
+)
 
-@app.middleware("http")
-async def enforce_api_key(request: Request, call_next):
-    is_api_request = request.url.path.startswith("/api/")
-    is_preflight = request.method == "OPTIONS"
-    auth_enabled = bool(_api_keys)
-
-    if not is_api_request or is_preflight or not auth_enabled:
-        return await call_next(request)
-
-    rejection = _validate_api_key(request)
-    if rejection:
-        return rejection
-
-    return await call_next(request)
 
+# Compress text responses. Added before CORS so CORS headers still wrap it;
+# responses that already set Content-Encoding (pre-gzipped widget.js) pass
+# through untouched.
+app.add_middleware(GZipMiddleware, minimum_size=512)
 
-# CORSMiddleware added AFTER auth so it wraps auth as the outermost layer.
+# CORSMiddleware added last so it is the outermost layer.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=_cors_origins,
@@ -235,81 +314,417 @@ async def health():
     return {"status": "ok"}
 
 
+@functools.lru_cache(maxsize=16)
+def _render_demo(base_url: str) -> bytes:
+    return _DEMO_TEMPLATE.replace(BASE_URL_PLACEHOLDER.encode(), base_url.encode())
+
+
+@functools.lru_cache(maxsize=16)
+def _render_widget(base_url: str) -> bytes:
+    return _WIDGET_TEMPLATE.replace(BASE_URL_PLACEHOLDER.encode(), base_url.encode())
+
+
+@functools.lru_cache(maxsize=16)
+def _render_widget_gzip(base_url: str) -> bytes:
+    return gzip.compress(_render_widget(base_url))
+
+
+def _accepts_gzip(request: Request) -> bool:
+    """Return True if Accept-Encoding lists gzip with a non-zero q-value."""
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() != "gzip":
+            continue
+        _, _, q = params.partition("q=")
+        try:
+            return not q.strip() or float(q) > 0
+        except ValueError:
+            return False
+    return False
+
+
 @app.get("/", response_class=HTMLResponse)
 async def demo_page(request: Request):
     base_url = str(request.base_url).rstrip("/")
-    html = DEMO_HTML_PATH.read_text(encoding="utf-8").replace(
-        BASE_URL_PLACEHOLDER, base_url
-    )
-    return HTMLResponse(html)
+    return HTMLResponse(_render_demo(base_url))
 
 
 @app.get("/widget.js")
 async def widget_js(request: Request):
     base_url = str(request.base_url).rstrip("/")
-    script = WIDGET_JS_PATH.read_text(encoding="utf-8").replace(
-        BASE_URL_PLACEHOLDER, base_url
-    )
+    if _accepts_gzip(request):
+        return Response(
+            content=_render_widget_gzip(base_url),
+            media_type="application/javascript",
+            headers=NO_CACHE_GZIP_HEADERS,
+        )
     return Response(
-        content=script, media_type="application/javascript", headers=NO_CACHE_HEADERS
+        content=_render_widget(base_url),
+        media_type="application/javascript",
+        headers=NO_CACHE_HEADERS,
     )
 
 
-def _evict_expired_cache() -> None:
-    """Remove all expired entries from the posts cache."""
-    now = time.monotonic()
-    expired = [k for k, (expiry, _) in _posts_cache.items() if expiry <= now]
-    for k in expired:
-        del _posts_cache[k]
+def _cache_get(key: tuple[str, int]) -> _PostsEntry | None:
+    """Return the entry for key, which may be past expiry.
+
+    Entries are kept for CACHE_STALE_SECONDS after expiry so they can be
+    served if Facebook is unavailable; after that they are dropped.
+    """
+    entry = _posts_cache.get(key)
+    if not entry:
+        return None
+    if entry.expiry + CACHE_STALE_SECONDS <= time.monotonic():
+        del _posts_cache[key]
+        return None
+    _posts_cache.move_to_end(key)
+    return entry
+
+
+def _cache_set(
+    key: tuple[str, int],
+    body: bytes,
+    gzip_body: bytes,
+    etag: str,
+    ttl: float = CACHE_TTL_SECONDS,
+) -> _PostsEntry:
+    """Store body for ttl seconds, evicting the least recently used."""
+    gzip_etag = f'{etag[:-1]}-gzip"'
+    entry = _PostsEntry(time.monotonic() + ttl, body, gzip_body, etag, gzip_etag)
+    _posts_cache[key] = entry
+    _posts_cache.move_to_end(key)
+    while len(_posts_cache) > CACHE_MAX_ENTRIES:
+        _posts_cache.popitem(last=False)
+    return entry
+
+
+# ── Shared cache (Redis) ───────────────────────────────────────────────────────
+# With REDIS_URL set, Redis is a second tier behind the in-process LRU so every
+# worker sees pages fetched by any other. Redis errors are logged and treated
+# as a miss; the in-process cache keeps serving.
+
+
+def _get_redis() -> redis.Redis | None:
+    global _redis
+    if REDIS_URL and _redis is None:
+        # Short timeouts: a slow Redis should degrade to a miss, not a hang.
+        _redis = redis.from_url(
+            REDIS_URL, socket_timeout=1.0, socket_connect_timeout=1.0
+        )
+    return _redis
+
+
+async def _close_redis() -> None:
+    global _redis
+    if _redis:
+        await _redis.aclose()
+        _redis = None
+
+
+def _redis_key(key: tuple[str, int]) -> str:
+    return f"fbwidget:posts:{key[0]}:{key[1]}"
 
 
-def _get_cached_posts(page_id: str, limit: int) -> JSONResponse | None:
+async def _shared_cache_get(
+    key: tuple[str, int],
+) -> tuple[float, bytes, bytes, str] | None:
+    """Return (remaining_seconds, body, gzip_body, etag) from Redis.
+
+    remaining_seconds is negative for an entry that is past expiry.
+    """
+    client = _get_redis()
+    if client is None:
+        return None
+    try:
+        expires_at, body, gzip_body, etag = await client.hmget(
+            _redis_key(key), ["expires_at", "body", "gzip_body", "etag"]
+        )
+    except redis.RedisError as e:
+        logger.warning("Redis read failed for %s: %s", key, e)
+        return None
+    # The client is created without decode_responses, so values are bytes.
+    if not (
+        isinstance(expires_at, bytes)
+        and isinstance(body, bytes)
+        and isinstance(gzip_body, bytes)
+        and isinstance(etag, bytes)
+    ):
+        return None
+    return float(expires_at) - time.time(), body, gzip_body, etag.decode()
+
+
+async def _shared_cache_set(key: tuple[str, int], entry: _PostsEntry) -> None:
+    client = _get_redis()
+    if client is None:
+        return
+    name = _redis_key(key)
+    try:
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                name,
+                mapping={
+                    "expires_at": time.time() + CACHE_TTL_SECONDS,
+                    "body": entry.body,
+                    "gzip_body": entry.gzip_body,
+                    "etag": entry.etag,
+                },
+            )
+            # Keep stale entries around for the stale-if-error fallback.
+            pipe.expire(name, CACHE_TTL_SECONDS + CACHE_STALE_SECONDS)
+            await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Redis write failed for %s: %s", key, e)
+
+
+def _negative_cache_get(key: tuple[str, int]) -> Exception | None:
+    """Return the cached failure for key if it has not yet expired."""
+    entry = _negative_cache.get(key)
+    if not entry:
+        return None
+    expiry, exc = entry
+    if expiry <= time.monotonic():
+        del _negative_cache[key]
+        return None
+    _negative_cache.move_to_end(key)
+    return exc
+
+
+def _negative_cache_set(key: tuple[str, int], exc: Exception) -> None:
+    """Remember exc for key if it is a failure type worth caching."""
+    for exc_type, ttl in _NEGATIVE_CACHE_TTLS:
+        if isinstance(exc, exc_type):
+            _negative_cache[key] = (time.monotonic() + ttl, exc)
+            _negative_cache.move_to_end(key)
+            while len(_negative_cache) > CACHE_MAX_ENTRIES:
+                _negative_cache.popitem(last=False)
+            return
+
+
+def _etag_matches(request: Request, entry: _PostsEntry) -> bool:
+    """Return True if If-None-Match names either encoding's ETag for entry."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etags = (entry.etag, entry.gzip_etag)
+    return any(
+        tag.strip().removeprefix("W/") in etags for tag in if_none_match.split(",")
+    )
+
+
+# Posts bodies are gzipped once when cached; sending them with Content-Encoding
+# set makes GZipMiddleware pass them through instead of recompressing per hit.
+# Identity responses get no Vary here: GZipMiddleware adds its own.
+_POSTS_GZIP_HEADERS = {"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+
+
+@functools.lru_cache(maxsize=256)
+def _fresh_headers(
+    max_age_bucket: int, etag: str, gzipped: bool
+) -> MappingProxyType[str, str]:
+    """Headers for a fresh posts response; max-age is in 10-second buckets.
+
+    Rounding down lets hits within the same bucket share one immutable
+    mapping instead of formatting a new header dict per request.
+    """
+    return MappingProxyType(
+        {
+            "Cache-Control": f"public, max-age={max_age_bucket * 10}",
+            "ETag": etag,
+            **(_POSTS_GZIP_HEADERS if gzipped else {}),
+        }
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _stale_headers(etag: str, gzipped: bool) -> MappingProxyType[str, str]:
+    return MappingProxyType(
+        {
+            "Cache-Control": f"public, max-age=10, stale-if-error={CACHE_STALE_SECONDS}",
+            "ETag": etag,
+            **(_POSTS_GZIP_HEADERS if gzipped else {}),
+        }
+    )
+
+
+def _posts_response(
+    request: Request, entry: _PostsEntry, max_age_bucket: int | None
+) -> Response:
+    """Wrap an already-serialised posts body, or answer 304 if the client has it.
+
+    max_age_bucket is the remaining TTL in 10-second buckets, or None for a
+    stale response served after an upstream error.
+    """
+    gzipped = _accepts_gzip(request)
+    etag = entry.gzip_etag if gzipped else entry.etag
+    if max_age_bucket is None:
+        headers = _stale_headers(etag, gzipped)
+    else:
+        headers = _fresh_headers(max_age_bucket, etag, gzipped)
+    # A 304 carries the same validator and metadata the 200 would have.
+    if _etag_matches(request, entry):
+        return Response(status_code=304, headers=headers)
+    content = entry.gzip_body if gzipped else entry.body
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+def _get_cached_posts(request: Request, page_id: str, limit: int) -> Response | None:
     """Return a cached response if one exists and has not yet expired."""
-    entry = _posts_cache.get((page_id, limit))
+    entry = _cache_get((page_id, limit))
     if not entry:
         return None
-    expiry, payload = entry
-    remaining_seconds = int(expiry - time.monotonic())
+    remaining_seconds = int(entry.expiry - time.monotonic())
     if remaining_seconds <= 0:
         return None
-    return JSONResponse(
-        payload, headers={"Cache-Control": f"public, max-age={remaining_seconds}"}
+    if remaining_seconds < CACHE_TTL_SECONDS / 4:
+        _schedule_refresh(page_id, limit)
+    return _posts_response(request, entry, remaining_seconds // 10)
+
+
+def _get_stale_posts(request: Request, page_id: str, limit: int) -> Response | None:
+    """Return the last cached body, fresh or stale, for use after an upstream error."""
+    entry = _cache_get((page_id, limit))
+    if not entry:
+        return None
+    return _posts_response(request, entry, None)
+
+
+async def _fetch_posts(
+    page_id: str, limit: int, min_remaining: float = 0
+) -> _PostsEntry:
+    """Return the posts cache entry for a key, sharing one fetch per key.
+
+    Everything up to registering in _inflight runs without an await, so only
+    one fill task per key reaches Facebook; every caller awaits that task.
+    """
+    key = (page_id, limit)
+    # Recent not-found/token/permission failures are re-raised without a fetch.
+    cached_error = _negative_cache_get(key)
+    if cached_error:
+        raise cached_error.with_traceback(None)
+
+    # Only a hit if more than min_remaining seconds of its TTL are left.
+    entry = _cache_get(key)
+    if entry and entry.expiry - time.monotonic() > min_remaining:
+        return entry
+
+    task = _inflight.get(key)
+    if task is None:
+        # The fill runs in its own task so no single request's cancellation
+        # can cancel it for everyone else waiting on the key.
+        task = asyncio.create_task(_fill_posts(key, min_remaining))
+        # Mark the exception as retrieved so asyncio doesn't log it when
+        # every waiter has gone away.
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        _inflight[key] = task
+    # Shield so a disconnecting client only stops its own wait.
+    return await asyncio.shield(task)
+
+
+async def _fill_posts(key: tuple[str, int], min_remaining: float) -> _PostsEntry:
+    page_id, limit = key
+    try:
+        # Another worker may have fetched it; copy even a stale shared entry
+        # locally so the stale-if-error fallback can use it.
+        shared = await _shared_cache_get(key)
+        if shared:
+            remaining, body, gzip_body, etag = shared
+            entry = _cache_set(key, body, gzip_body, etag, ttl=remaining)
+            if remaining > min_remaining:
+                return entry
+
+        page_info, posts = await fb.get_page_bundle(page_id, limit=limit)
+        body = orjson.dumps({"page": page_info, "posts": posts})
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        entry = _cache_set(key, body, gzip.compress(body, compresslevel=6), etag)
+        # Waiters only need the local entry; don't hold them on the Redis write.
+        _run_in_background(_shared_cache_set(key, entry))
+        return entry
+    except Exception as e:
+        _negative_cache_set(key, e)
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+async def _refresh_posts(page_id: str, limit: int) -> None:
+    try:
+        # Skip the upstream call if another refresh already filled the key.
+        await _fetch_posts(page_id, limit, min_remaining=CACHE_TTL_SECONDS / 4)
+    except Exception as e:
+        logger.warning("Background refresh failed for page_id=%s: %s", page_id, e)
+
+
+def _schedule_refresh(page_id: str, limit: int) -> None:
+    """Refresh a soon-to-expire entry in the background (stale-while-revalidate)."""
+    if (page_id, limit) in _inflight:
+        return
+    _run_in_background(_refresh_posts(page_id, limit))
+
+
+def _run_in_background(coro: Coroutine[Any, Any, None]) -> None:
+    task = asyncio.create_task(coro)
+    # Hold a reference so the task isn't garbage collected mid-flight.
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+_ERROR_STATUS_CODES: tuple[tuple[type[Exception], int], ...] = (
+    (fb.RateLimitError, 429),
+    (fb.PageNotFoundError, 404),
+    (fb.ConfigurationError, 500),
+    (fb.TokenError, 500),
+    (fb.PermissionError, 403),
+    (fb.FacebookAPIError, 502),
+)
+
+
+def _error_response(exc: Exception, page_id: str) -> ORJSONResponse:
+    """Map a fetch failure to the JSON error returned to the widget."""
+    for exc_type, status_code in _ERROR_STATUS_CODES:
+        if isinstance(exc, exc_type):
+            return ORJSONResponse({"error": str(exc)}, status_code=status_code)
+    logger.error(
+        "Unexpected error fetching posts for page_id=%s", page_id, exc_info=exc
     )
+    return ORJSONResponse({"error": "Internal server error"}, status_code=500)
 
 
-@app.get("/api/posts")
+@api_router.get("/posts")
 @limiter.limit("60/minute")
 async def api_posts(
     request: Request,
     page_id: str = Query(...),
     limit: int = Query(5, ge=1, le=20),
 ):
-    cached = _get_cached_posts(page_id, limit)
+    cached = _get_cached_posts(request, page_id, limit)
     if cached:
         return cached
 
     try:
-        page_info = await fb.get_page_info(page_id)
-        posts = await fb.get_page_posts(page_id, limit=limit)
-    except fb.RateLimitError as e:
-        return JSONResponse({"error": str(e)}, status_code=429)
+        entry = await _fetch_posts(page_id, limit)
     except fb.PageNotFoundError as e:
-        return JSONResponse({"error": str(e)}, status_code=404)
-    except fb.ConfigurationError as e:
-        return JSONResponse({"error": str(e)}, status_code=500)
-    except fb.TokenError as e:
-        return JSONResponse({"error": str(e)}, status_code=500)
-    except fb.PermissionError as e:
-        return JSONResponse({"error": str(e)}, status_code=403)
+        return _error_response(e, page_id)
     except fb.FacebookAPIError as e:
-        return JSONResponse({"error": str(e)}, status_code=502)
-    except Exception:
-        logger.exception("Unexpected error fetching posts for page_id=%s", page_id)
-        return JSONResponse({"error": "Internal server error"}, status_code=500)
-
-    payload = {"page": page_info, "posts": posts}
-    _evict_expired_cache()
-    _posts_cache[(page_id, limit)] = (time.monotonic() + CACHE_TTL_SECONDS, payload)
-    return JSONResponse(
-        payload, headers={"Cache-Control": f"public, max-age={CACHE_TTL_SECONDS}"}
-    )
+        # Upstream failures only (transport errors arrive as FacebookAPIError);
+        # bugs fall through to _error_response and get logged with a traceback.
+        stale = _get_stale_posts(request, page_id, limit)
+        if stale:
+            logger.warning(
+                "Serving stale posts for page_id=%s after upstream error: %s",
+                page_id,
+                e,
+            )
+            return stale
+        return _error_response(e, page_id)
+    except Exception as e:
+        return _error_response(e, page_id)
+
+    # The body may come from Redis or a near-expiry local entry, so advertise
+    # the time it actually has left rather than the full TTL.
+    remaining_seconds = max(int(entry.expiry - time.monotonic()), 0)
+    return _posts_response(request, entry, remaining_seconds // 10)
+
+
+app.include_router(api_router)